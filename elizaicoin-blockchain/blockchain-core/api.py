@@ -2,6 +2,7 @@ from flask import Flask, jsonify, request, abort
 from blockchain import Blockchain, Block
 import scrypt_utils
 import json
+import os
 import uuid
 from typing import Dict, List, Any, Optional
 from flask_cors import CORS
@@ -11,8 +12,8 @@ import time
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Initialize blockchain
-blockchain = Blockchain()
+# Initialize blockchain on the network selected by EZC_NETWORK (default: mainnet)
+blockchain = Blockchain(network=os.environ.get('EZC_NETWORK'))
 
 # Generate a node identifier
 node_identifier = str(uuid.uuid4()).replace('-', '')
@@ -245,8 +246,8 @@ def get_stats():
     """
     stats = blockchain.get_chain_stats()
     
-    # Add Scrypt parameters
-    stats['scrypt_params'] = scrypt_utils.get_scrypt_params()
+    # Add Scrypt parameters of the chain's network
+    stats['scrypt_params'] = dict(blockchain.scrypt_params)
     
     return jsonify(stats), 200
 
@@ -259,10 +260,12 @@ def reset_blockchain():
         JSON response with reset confirmation
     """
     global blockchain
-    blockchain = Blockchain()
+    blockchain = Blockchain(network=blockchain.network)
     scrypt_utils.reset_energy_consumption()
     
     return jsonify({'message': 'Blockchain reset successfully'}), 200
 
 if __name__ == '__main__':
+    # Make sure every scrypt backend agrees before serving
+    scrypt_utils.self_check(blockchain.scrypt_params)
     app.run(host='0.0.0.0', port=5000)
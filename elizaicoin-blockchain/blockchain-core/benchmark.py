@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Elizaicoin core hot paths.
+
+Runs every benchmark and writes the results as JSON, so two runs can be
+compared to spot regressions:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Any, Optional
+
+import psutil
+import scrypt_utils
+from blockchain import Blockchain
+
+# Sizes used by the full and the --quick runs
+FULL_SIZES = {
+    "hashes": 200,
+    "mempool_sizes": [0, 10, 100, 1000],
+    "chain_heights": [10, 100, 1000],
+    "lookups": 1000,
+    "requests": 200,
+    "shares": 2000,
+    "scale_height": 100000,
+}
+QUICK_SIZES = {
+    "hashes": 50,
+    "mempool_sizes": [0, 10, 100],
+    "chain_heights": [10, 50],
+    "lookups": 200,
+    "requests": 50,
+    "shares": 200,
+    "scale_height": 10000,
+}
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """Summarize per-operation timings (in seconds) in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "total_s": sum(ordered),
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def time_calls(fn: Callable[[int], Any], runs: int) -> Dict[str, Any]:
+    """Time ``runs`` calls of ``fn(i)``."""
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def build_chain(network: str, height: int, txs_per_block: int = 2) -> Blockchain:
+    """Mine a chain of the given height on the given network."""
+    blockchain = Blockchain(network=network)
+    for i in range(height):
+        for j in range(txs_per_block):
+            blockchain.add_transaction(f"addr-{j}", f"addr-{i % 7}", 1.0)
+        blockchain.mine_pending_transactions(f"miner-{i % 3}")
+    return blockchain
+
+
+def bench_hashrate(network: str, sizes: Dict[str, Any], workers: int) -> Dict[str, Any]:
+    """Hashes per second for the single-thread and process-pool backends."""
+    params = Blockchain(network=network).scrypt_params
+    headers = [f"benchmark-header-{nonce}" for nonce in range(sizes["hashes"])]
+    results = {}
+
+    for name, options in (("single", {}), ("pool", {"workers": workers})):
+        backend = scrypt_utils.create_backend(name, params, **options)
+        try:
+            backend.hash_batch(headers[:backend.batch_size])  # Warm up the pool
+            start = time.perf_counter()
+            for i in range(0, len(headers), backend.batch_size):
+                backend.hash_batch(headers[i:i + backend.batch_size])
+            elapsed = time.perf_counter() - start
+        finally:
+            backend.close()
+        results[name] = {
+            "workers": options.get("workers", 1),
+            "hashes": len(headers),
+            "seconds": elapsed,
+            "hashes_per_second": len(headers) / elapsed,
+        }
+    return results
+
+
+def bench_mining(network: str, sizes: Dict[str, Any]) -> Dict[str, Any]:
+    """Time to mine one block at several mempool sizes."""
+    results = {}
+    for mempool_size in sizes["mempool_sizes"]:
+        blockchain = Blockchain(network=network)
+
+        # Fill the mempool outside the timed region
+        samples = []
+        for i in range(3):
+            for j in range(mempool_size):
+                blockchain.add_transaction(f"sender-{j}", f"recipient-{j}", 1.0)
+            start = time.perf_counter()
+            blockchain.mine_pending_transactions("miner")
+            samples.append(time.perf_counter() - start)
+        results[str(mempool_size)] = summarize(samples)
+    return results
+
+
+def bench_validation(network: str, sizes: Dict[str, Any]) -> Dict[str, Any]:
+    """Time of ``is_chain_valid`` at several chain heights."""
+    results = {}
+    for height in sizes["chain_heights"]:
+        blockchain = build_chain(network, height)
+        results[str(height)] = time_calls(lambda i: blockchain.is_chain_valid(), 3)
+    return results
+
+
+def bench_lookups(blockchain: Blockchain, sizes: Dict[str, Any]) -> Dict[str, Any]:
+    """Block, transaction and address lookup times on a mined chain."""
+    blocks = blockchain.chain
+    runs = sizes["lookups"]
+    # Sample lookup targets spread evenly over the chain
+    sampled = [blocks[(i * 7919) % len(blocks)] for i in range(runs)]
+    tx_hashes = [tx["hash"] for block in sampled for tx in block.transactions] or ["missing"]
+    addresses = [tx["recipient"] for block in sampled for tx in block.transactions] or ["missing"]
+    return {
+        "height": len(blocks),
+        "block_by_index": time_calls(lambda i: blockchain.get_block_by_index(sampled[i].index), runs),
+        "block_by_hash": time_calls(lambda i: blockchain.get_block_by_hash(sampled[i].hash), runs),
+        "tx_by_hash": time_calls(lambda i: blockchain.get_transaction_by_hash(tx_hashes[i % len(tx_hashes)]), runs),
+        "address": time_calls(lambda i: blockchain.get_transactions_by_address(addresses[i % len(addresses)]), runs),
+    }
+
+
+def bench_api(blockchain: Blockchain, sizes: Dict[str, Any]) -> Dict[str, Any]:
+    """Latency of ``/blocks`` and ``/stats`` through the Flask test client."""
+    import api
+
+    api.blockchain = blockchain
+    client = api.app.test_client()
+    runs = sizes["requests"]
+    last_page = max(1, (len(blockchain.chain) + 9) // 10)
+
+    return {
+        "height": len(blockchain.chain),
+        "blocks_first_page": time_calls(lambda i: client.get('/blocks?page=1&per_page=10'), runs),
+        "blocks_last_page": time_calls(lambda i: client.get(f'/blocks?page={last_page}&per_page=10'), runs),
+        "stats": time_calls(lambda i: client.get('/stats'), runs),
+    }
+
+
+class _BenchWriter:
+    """Minimal stand-in for an asyncio StreamWriter."""
+
+    def __init__(self):
+        self.bytes_written = 0
+
+    def get_extra_info(self, name):
+        return ("127.0.0.1", 0)
+
+    def write(self, data):
+        self.bytes_written += len(data)
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+def bench_stratum(network: str, sizes: Dict[str, Any], workers: int) -> Dict[str, Any]:
+    """Share submissions handled per second by a Stratum client session."""
+    import stratum_server
+    from concurrent.futures import ProcessPoolExecutor
+
+    stratum_server.blockchain = Blockchain(network=network)
+    stratum_server.share_executor = ProcessPoolExecutor(max_workers=workers)
+    runs = sizes["shares"]
+
+    async def run():
+        await stratum_server.generate_new_job()
+        client = stratum_server.StratumClient(None, _BenchWriter(), "bench")
+        await client.handle_subscribe({"id": 1, "method": "mining.subscribe", "params": []})
+        await client.handle_authorize({"id": 2, "method": "mining.authorize", "params": ["bench.worker", "x"]})
+        start = time.perf_counter()
+        for nonce in range(runs):
+            # A block-solving share replaces the job
+            job = stratum_server.current_job
+            await client.handle_submit({
+                "id": 3 + nonce,
+                "method": "mining.submit",
+                "params": ["bench.worker", job["job_id"], "00000000", job["ntime"], format(nonce, '08x')]
+            })
+        return time.perf_counter() - start, client
+
+    try:
+        elapsed, client = asyncio.run(run())
+    finally:
+        stratum_server.share_executor.shutdown()
+        stratum_server.share_executor = None
+    return {
+        "shares": runs,
+        "valid_shares": client.valid_shares,
+        "seconds": elapsed,
+        "shares_per_second": runs / elapsed,
+    }
+
+
+def bench_scale(network: str, sizes: Dict[str, Any]) -> Dict[str, Any]:
+    """Import time, memory, lookups and ``/stats`` on a large synthetic chain."""
+    from synthetic_chain import generate_chain, load_synthetic_chain
+
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    start = time.perf_counter()
+    blockchain = load_synthetic_chain(
+        generate_chain(sizes["scale_height"], txs_per_block=2, distribution="zipf", network=network, seed=1),
+        network=network
+    )
+    load_seconds = time.perf_counter() - start
+    rss_after = process.memory_info().rss
+
+    scaled_sizes = dict(sizes, requests=max(1, sizes["requests"] // 10), lookups=max(1, sizes["lookups"] // 10))
+    return {
+        "height": len(blockchain.chain),
+        "generate_and_import_s": load_seconds,
+        "rss_delta_mb": (rss_after - rss_before) / 1e6,
+        "lookups": bench_lookups(blockchain, scaled_sizes),
+        "api": bench_api(blockchain, scaled_sizes),
+    }
+
+
+BENCHMARKS = ["hashrate", "mining", "validation", "lookups", "api", "stratum", "scale"]
+
+
+def run_benchmarks(network: str, quick: bool, workers: int, only: Optional[List[str]] = None,
+                   scale_height: Optional[int] = None) -> Dict[str, Any]:
+    """Run the selected benchmarks and return the JSON-serializable report."""
+    sizes = dict(QUICK_SIZES if quick else FULL_SIZES)
+    if scale_height:
+        sizes["scale_height"] = scale_height
+    selected = only or BENCHMARKS
+    results = {}
+
+    # Lookups and API latency share one mined chain
+    lookup_chain = None
+    if "lookups" in selected or "api" in selected:
+        lookup_chain = build_chain(network, sizes["chain_heights"][-1])
+
+    for name in selected:
+        start = time.perf_counter()
+        if name == "hashrate":
+            results[name] = bench_hashrate(network, sizes, workers)
+        elif name == "mining":
+            results[name] = bench_mining(network, sizes)
+        elif name == "validation":
+            results[name] = bench_validation(network, sizes)
+        elif name == "lookups":
+            results[name] = bench_lookups(lookup_chain, sizes)
+        elif name == "api":
+            results[name] = bench_api(lookup_chain, sizes)
+        elif name == "stratum":
+            results[name] = bench_stratum(network, sizes, workers)
+        elif name == "scale":
+            results[name] = bench_scale(network, sizes)
+        print(f"{name}: done in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "network": network,
+            "quick": quick,
+            "workers": workers,
+            "sizes": sizes,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def _flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Report the change in every timing and throughput metric against a baseline."""
+    now = _flatten(current["results"])
+    before = _flatten(baseline["results"])
+    lines = []
+    for path in sorted(now):
+        if path in before and before[path] and (path.endswith("_ms") or path.endswith("_per_second")):
+            ratio = now[path] / before[path]
+            lines.append(f"{path}: {before[path]:.4g} -> {now[path]:.4g} ({ratio:.2f}x)")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Elizaicoin core benchmarks')
+    parser.add_argument('--network', type=str, default='regtest', help='Network profile to benchmark')
+    parser.add_argument('--output', type=str, default='benchmark_results.json', help='JSON results file')
+    parser.add_argument('--compare', type=str, help='Previous results file to compare against')
+    parser.add_argument('--quick', action='store_true', help='Use smaller sizes')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Pool backend workers')
+    parser.add_argument('--only', type=str, nargs='+', choices=BENCHMARKS, help='Benchmarks to run')
+    parser.add_argument('--scale-height', type=int, help='Synthetic chain height for the scale benchmark')
+
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.network, args.quick, args.workers, args.only, args.scale_height)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for line in compare(report, baseline):
+            print(line)
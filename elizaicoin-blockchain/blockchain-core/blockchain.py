@@ -1,24 +1,30 @@
 import hashlib
 import json
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import scrypt_utils
+from networks import NetworkParams, get_network
+
+# Number of blocks re-hashed per backend call during chain validation
+VALIDATION_BATCH_SIZE = 64
 
 class Block:
     def __init__(self, index: int, timestamp: float, transactions: List[Dict], 
-                 previous_hash: str, nonce: int = 0, difficulty: int = 4):
+                 previous_hash: str, nonce: int = 0, difficulty: int = 4,
+                 scrypt_params: Optional[Dict[str, Any]] = None):
         self.index = index
         self.timestamp = timestamp
         self.transactions = transactions
         self.previous_hash = previous_hash
         self.nonce = nonce
         self.difficulty = difficulty
+        self.scrypt_params = scrypt_params  # None means the backend's parameters
         self.hash = self.calculate_hash()
         self.energy_consumed = 0  # Will be set during mining
 
-    def calculate_hash(self) -> str:
-        """Calculate the hash of the block using Scrypt algorithm."""
-        block_string = json.dumps({
+    def get_block_string(self) -> str:
+        """Serialize the hashed fields of the block."""
+        return json.dumps({
             "index": self.index,
             "timestamp": self.timestamp,
             "transactions": self.transactions,
@@ -26,9 +32,43 @@ class Block:
             "nonce": self.nonce,
             "difficulty": self.difficulty
         }, sort_keys=True)
+    
+    def get_nonce_template(self) -> Tuple[str, str]:
+        """
+        Split the block string around the nonce.
         
+        ``prefix + str(nonce) + suffix`` equals the block string for that
+        nonce, so candidate headers can be formatted without re-encoding
+        the transactions.
+        """
+        # Keys are sorted, so the nonce precedes every free-form field
+        prefix, suffix = self.get_block_string().split(f'"nonce": {self.nonce}', 1)
+        return prefix + '"nonce": ', suffix
+
+    def calculate_hash(self) -> str:
+        """Calculate the hash of the block using Scrypt algorithm."""
         # Use Scrypt for hashing (energy-efficient PoW)
-        return scrypt_utils.hash_scrypt(block_string)
+        return scrypt_utils.hash_scrypt(self.get_block_string(), self.scrypt_params)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], scrypt_params: Optional[Dict[str, Any]] = None) -> 'Block':
+        """
+        Rebuild a block from its dictionary form without re-hashing it.
+        
+        The stored hash is taken as-is; use Blockchain.import_chain to
+        verify it.
+        """
+        block = cls.__new__(cls)
+        block.index = data["index"]
+        block.timestamp = data["timestamp"]
+        block.transactions = data["transactions"]
+        block.previous_hash = data["previous_hash"]
+        block.nonce = data["nonce"]
+        block.difficulty = data["difficulty"]
+        block.scrypt_params = scrypt_params
+        block.hash = data["hash"]
+        block.energy_consumed = data.get("energy_consumed", 0)
+        return block
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert block to dictionary for JSON serialization."""
@@ -45,11 +85,20 @@ class Block:
 
 
 class Blockchain:
-    def __init__(self):
+    def __init__(self, network: Optional[Any] = None):
+        """
+        Args:
+            network: Network profile name ("mainnet", "testnet", "regtest")
+                or a NetworkParams instance; defaults to mainnet
+        """
+        self.network: NetworkParams = get_network(network)
+        self.scrypt_params = self.network.scrypt_params
         self.chain: List[Block] = []
         self.pending_transactions: List[Dict] = []
         self.nodes = set()
-        self.difficulty = 4
+        self.difficulty = self.network.initial_difficulty
+        self.target_block_time = self.network.target_block_time
+        self.retarget_interval = self.network.retarget_interval
         self.block_reward = 10.0
         self.energy_efficiency_factor = 1.0  # Adjusts rewards based on energy efficiency
         
@@ -58,16 +107,74 @@ class Blockchain:
         self.coin_symbol = "EZC"
         self.max_supply = 30_000_000  # 30 million coins
         self.current_supply = 0
-        self.halving_interval = 210000  # Number of blocks for reward halving (similar to Bitcoin)
+        self.halving_interval = self.network.halving_interval  # Number of blocks for reward halving
+        
+        # Blocks up to this index were imported in trusted mode, without PoW checks
+        self.trusted_height = -1
         
         # Create the genesis block
         self.create_genesis_block()
     
     def create_genesis_block(self) -> None:
         """Create the first block in the chain (genesis block)."""
-        genesis_block = Block(0, time.time(), [], "0")
+        genesis_block = Block(0, time.time(), [], "0", difficulty=self.difficulty,
+                              scrypt_params=self.scrypt_params)
         genesis_block.hash = genesis_block.calculate_hash()
-        self.chain.append(genesis_block)
+        self._append_block(genesis_block)
+    
+    def _append_block(self, block: Block) -> None:
+        """Append a block to the chain. Every path that extends the chain goes through here."""
+        self.chain.append(block)
+    
+    def import_chain(self, blocks: Iterable[Block], trusted: bool = False) -> None:
+        """
+        Replace the chain with externally produced blocks, starting at genesis.
+        
+        Index sequence and hash links are always checked. Block hashes and
+        proof of work are verified unless ``trusted`` is set.
+        
+        TRUSTED MODE SKIPS PROOF OF WORK. It exists to load synthetic chains
+        for scale testing and must never be used for blocks from peers.
+        
+        Args:
+            blocks: The blocks in chain order, genesis first
+            trusted: Skip hash and proof-of-work verification
+            
+        Raises:
+            ValueError: If the blocks do not form a valid chain
+        """
+        blocks = list(blocks)
+        if not blocks or blocks[0].index != 0:
+            raise ValueError("Imported chain must start with a genesis block")
+        
+        for i, block in enumerate(blocks):
+            if block.index != i:
+                raise ValueError(f"Unexpected block index {block.index} at height {i}")
+            if i > 0 and block.previous_hash != blocks[i - 1].hash:
+                raise ValueError(f"Block {i} does not link to its predecessor")
+        
+        if not trusted:
+            for start in range(0, len(blocks), VALIDATION_BATCH_SIZE):
+                batch = blocks[start:start + VALIDATION_BATCH_SIZE]
+                hashes = scrypt_utils.hash_batch([block.get_block_string() for block in batch],
+                                                 self.scrypt_params)
+                for block, hash_value in zip(batch, hashes):
+                    if block.hash != hash_value:
+                        raise ValueError(f"Block {block.index} has an invalid hash")
+                    if block.index > 0 and not hash_value.startswith("0" * block.difficulty):
+                        raise ValueError(f"Block {block.index} does not meet its difficulty")
+        
+        self.chain = []
+        self.current_supply = 0
+        for block in blocks:
+            block.scrypt_params = self.scrypt_params
+            self._append_block(block)
+            for transaction in block.transactions:
+                if transaction.get("sender") == "0" and transaction.get("data", {}).get("type") == "mining_reward":
+                    self.current_supply += transaction.get("amount", 0)
+        
+        self.difficulty = blocks[-1].difficulty
+        self.trusted_height = len(blocks) - 1 if trusted else -1
     
     def get_latest_block(self) -> Block:
         """Return the most recent block in the chain."""
@@ -123,27 +230,27 @@ class Blockchain:
             timestamp=time.time(),
             transactions=self.pending_transactions,
             previous_hash=self.get_latest_block().hash,
-            difficulty=self.difficulty
+            difficulty=self.difficulty,
+            scrypt_params=self.scrypt_params
         )
         
-        # Mine the block (find valid nonce)
-        start_time = time.time()
-        energy_before = scrypt_utils.get_energy_consumption()
-        
-        self.proof_of_work(block)
+        # Mine the block (find valid nonce); energy is sampled in the background
+        job = scrypt_utils.energy_meter.begin_job()
+        try:
+            self.proof_of_work(block)
+        finally:
+            scrypt_utils.energy_meter.end_job(job)
         
-        # Calculate energy consumed
-        energy_after = scrypt_utils.get_energy_consumption()
-        block.energy_consumed = energy_after - energy_before
+        block.energy_consumed = job.energy_consumed
         
         # Add block to chain
-        self.chain.append(block)
+        self._append_block(block)
         
         # Reset pending transactions
         self.pending_transactions = []
         
-        # Adjust difficulty every 10 blocks
-        if len(self.chain) % 10 == 0:
+        # Adjust difficulty every retarget interval
+        if len(self.chain) % self.retarget_interval == 0:
             self.adjust_difficulty()
             
         # Adjust energy efficiency factor
@@ -159,10 +266,23 @@ class Blockchain:
             block: The block to mine
         """
         target = "0" * block.difficulty
+        if block.hash.startswith(target):
+            return
         
-        while block.hash[:block.difficulty] != target:
-            block.nonce += 1
-            block.hash = block.calculate_hash()
+        # Hash a whole range of nonces per backend call
+        prefix, suffix = block.get_nonce_template()
+        batch_size = scrypt_utils.get_backend().batch_size
+        nonce = block.nonce
+        
+        while True:
+            nonces = range(nonce + 1, nonce + 1 + batch_size)
+            hashes = scrypt_utils.hash_batch([f"{prefix}{n}{suffix}" for n in nonces], block.scrypt_params)
+            for candidate, hash_value in zip(nonces, hashes):
+                if hash_value.startswith(target):
+                    block.nonce = candidate
+                    block.hash = hash_value
+                    return
+            nonce = nonces[-1]
     
     def is_chain_valid(self) -> bool:
         """
@@ -171,33 +291,47 @@ class Blockchain:
         Returns:
             True if the chain is valid, False otherwise
         """
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i-1]
-            
-            # Check if the current block's hash is valid
-            if current_block.hash != current_block.calculate_hash():
+        batch_size = max(VALIDATION_BATCH_SIZE, scrypt_utils.get_backend().batch_size)
+        
+        # Blocks imported in trusted mode are only checked for their links
+        for i in range(1, min(len(self.chain), self.trusted_height + 1)):
+            if self.chain[i].previous_hash != self.chain[i-1].hash:
                 return False
+        
+        for start in range(max(1, self.trusted_height + 1), len(self.chain), batch_size):
+            blocks = self.chain[start:start + batch_size]
             
-            # Check if the current block points to the correct previous hash
-            if current_block.previous_hash != previous_block.hash:
-                return False
+            # Re-hash the whole batch in one backend call
+            hashes = scrypt_utils.hash_batch([block.get_block_string() for block in blocks],
+                                             self.scrypt_params)
+            
+            for offset, current_block in enumerate(blocks):
+                previous_block = self.chain[start + offset - 1]
+                
+                # Check if the current block's hash is valid
+                if current_block.hash != hashes[offset]:
+                    return False
+                
+                # Check if the current block points to the correct previous hash
+                if current_block.previous_hash != previous_block.hash:
+                    return False
         
         return True
     
     def adjust_difficulty(self) -> None:
-        """Adjust mining difficulty based on the time it took to mine the last 10 blocks."""
-        if len(self.chain) < 11:  # Need at least 10 blocks to calculate
+        """Adjust mining difficulty based on the time it took to mine the last retarget window."""
+        window = self.retarget_interval
+        if not self.network.retargeting or len(self.chain) < window + 1:  # Need a full window to calculate
             return
         
-        # Calculate average time for the last 10 blocks
-        last_10_blocks = self.chain[-10:]
-        first_timestamp = last_10_blocks[0].timestamp
-        last_timestamp = last_10_blocks[-1].timestamp
-        avg_time_per_block = (last_timestamp - first_timestamp) / 10
+        # Calculate average time for the last window of blocks
+        last_blocks = self.chain[-window:]
+        first_timestamp = last_blocks[0].timestamp
+        last_timestamp = last_blocks[-1].timestamp
+        avg_time_per_block = (last_timestamp - first_timestamp) / window
         
-        # Target time per block (e.g., 60 seconds)
-        target_time = 60
+        # Target time per block from the network profile
+        target_time = self.target_block_time
         
         # Adjust difficulty
         if avg_time_per_block < target_time * 0.8:
@@ -292,6 +426,19 @@ class Blockchain:
                 
         return None
     
+    def get_transactions_by_address(self, address: str) -> List[Dict]:
+        """Get all confirmed transactions sent or received by an address."""
+        results = []
+        for block in self.chain:
+            for transaction in block.transactions:
+                if transaction.get("sender") == address or transaction.get("recipient") == address:
+                    results.append({
+                        "transaction": transaction,
+                        "block_index": block.index,
+                        "block_hash": block.hash
+                    })
+        return results
+    
     def get_chain_data(self) -> List[Dict]:
         """Get the entire blockchain data."""
         return [block.to_dict() for block in self.chain]
@@ -300,6 +447,7 @@ class Blockchain:
         """Get statistics about the blockchain."""
         if not self.chain:
             return {
+                "network": self.network.name,
                 "blocks": 0,
                 "transactions": 0,
                 "difficulty": self.difficulty,
@@ -331,6 +479,7 @@ class Blockchain:
         supply_percentage = (self.current_supply / self.max_supply) * 100 if self.max_supply > 0 else 0
         
         return {
+            "network": self.network.name,
             "blocks": len(self.chain),
             "transactions": total_transactions,
             "difficulty": self.difficulty,
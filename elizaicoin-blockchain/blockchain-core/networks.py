@@ -0,0 +1,84 @@
+"""
+Network parameter profiles for Elizaicoin.
+
+A profile bundles the consensus parameters and the scrypt parameters of a
+network, so a node, the Stratum server and the tests can all be pointed at
+the same chain rules by name.
+"""
+
+from typing import Dict, Any, Optional
+import scrypt_utils
+
+
+class NetworkParams:
+    def __init__(self, name: str, scrypt_params: Dict[str, Any], initial_difficulty: int,
+                 target_block_time: float, retarget_interval: int, halving_interval: int,
+                 retargeting: bool = True):
+        self.name = name
+        self.scrypt_params = dict(scrypt_params)
+        self.initial_difficulty = initial_difficulty
+        self.target_block_time = target_block_time  # Seconds
+        self.retarget_interval = retarget_interval  # Blocks between difficulty adjustments
+        self.halving_interval = halving_interval    # Blocks between reward halvings
+        self.retargeting = retargeting
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the profile to a dictionary for JSON serialization."""
+        return {
+            "name": self.name,
+            "scrypt_params": dict(self.scrypt_params),
+            "initial_difficulty": self.initial_difficulty,
+            "target_block_time": self.target_block_time,
+            "retarget_interval": self.retarget_interval,
+            "halving_interval": self.halving_interval,
+            "retargeting": self.retargeting
+        }
+
+
+NETWORKS = {
+    "mainnet": NetworkParams(
+        name="mainnet",
+        scrypt_params=scrypt_utils.SCRYPT_PROFILES["standard"],
+        initial_difficulty=4,
+        target_block_time=60,
+        retarget_interval=10,
+        halving_interval=210000
+    ),
+    "testnet": NetworkParams(
+        name="testnet",
+        scrypt_params=scrypt_utils.SCRYPT_PROFILES["standard"],
+        initial_difficulty=2,
+        target_block_time=60,
+        retarget_interval=10,
+        halving_interval=210000
+    ),
+    # Low-cost scrypt and a fixed minimum difficulty: blocks take milliseconds
+    "regtest": NetworkParams(
+        name="regtest",
+        scrypt_params=scrypt_utils.SCRYPT_PROFILES["test"],
+        initial_difficulty=1,
+        target_block_time=1,
+        retarget_interval=10,
+        halving_interval=150,
+        retargeting=False
+    ),
+}
+
+DEFAULT_NETWORK = "mainnet"
+
+def get_network(network: Optional[Any] = None) -> NetworkParams:
+    """
+    Resolve a network profile.
+
+    Args:
+        network: A profile name, a NetworkParams instance or None for mainnet
+
+    Returns:
+        The network profile
+    """
+    if isinstance(network, NetworkParams):
+        return network
+    name = network or DEFAULT_NETWORK
+    if name not in NETWORKS:
+        raise ValueError(f"Unknown network: {name}")
+    return NETWORKS[name]
@@ -1,8 +1,11 @@
 import hashlib
+import os
 import time
 import random
+import threading
 import psutil
-from typing import Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 
 # Scrypt parameters (n=16384, r=8, p=1) as specified in the requirements
 SCRYPT_N = 16384  # CPU/memory cost factor
@@ -13,53 +16,377 @@ SCRYPT_DKLEN = 32 # Output length
 # For energy consumption simulation
 ENERGY_BASELINE = 0.1  # Base energy units per hash
 ENERGY_VARIANCE = 0.05 # Random variance in energy consumption
+ENERGY_SAMPLE_INTERVAL = 0.25  # Seconds between background CPU samples
 
-# Global counter for energy consumption simulation
-_total_energy_consumed = 0.0
+# Named scrypt parameter sets: the consensus parameters and a low-cost
+# profile for tests and local simulations
+SCRYPT_PROFILES = {
+    "standard": {"n": SCRYPT_N, "r": SCRYPT_R, "p": SCRYPT_P, "dklen": SCRYPT_DKLEN},
+    "test": {"n": 1024, "r": 1, "p": 1, "dklen": SCRYPT_DKLEN},
+}
 
-def hash_scrypt(data: str) -> str:
+
+class HashCounters:
     """
-    Hash data using Scrypt algorithm with the specified parameters.
+    Per-worker hash counters.
+
+    Every thread increments its own slot, so counting a hash needs no lock.
+    Hashes computed in other processes are reported by the parent with an
+    explicit worker name. Readers sum all slots.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._slots: Dict[str, list] = {}
+
+    def _register(self, worker: str) -> list:
+        with self._lock:
+            return self._slots.setdefault(worker, [0])
+
+    def add(self, count: int = 1, worker: Optional[str] = None) -> None:
+        """Count hashes for the calling thread, or for a named worker."""
+        if worker is not None:
+            slot = self._register(worker)
+            with self._lock:
+                slot[0] += count
+            return
+
+        slot = getattr(self._local, 'slot', None)
+        if slot is None:
+            thread = threading.current_thread()
+            slot = self._register(f"{thread.name}-{thread.ident}")
+            self._local.slot = slot
+        slot[0] += count
+
+    def totals(self) -> Dict[str, int]:
+        """Hash counts keyed by worker."""
+        with self._lock:
+            return {worker: slot[0] for worker, slot in self._slots.items()}
+
+    def total(self) -> int:
+        """Total hashes across all workers."""
+        return sum(self.totals().values())
+
+    def reset(self) -> None:
+        with self._lock:
+            for slot in self._slots.values():
+                slot[0] = 0
+
+
+class MiningJob:
+    """Energy and hash accounting for a single mining job."""
+
+    def __init__(self, energy_start: float, hashes_start: Dict[str, int]):
+        self.start_time = time.monotonic()
+        self.energy_start = energy_start
+        self.hashes_start = hashes_start
+        self.energy_consumed = 0.0
+        self.duration = 0.0
+        self.hashes = 0
+        self.workers = 0
+
+
+class EnergyMeter:
+    """
+    Background sampler for simulated energy consumption.
+
+    While at least one mining job is running, a daemon thread samples the
+    system-wide CPU usage every ``interval`` seconds and integrates energy
+    over time. Because the CPU sample is system-wide, work done by hashing
+    threads and worker processes is included. Hashing itself does no
+    accounting beyond bumping a per-thread counter.
+    """
+
+    def __init__(self, interval: float = ENERGY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.hash_counters = HashCounters()
+        self._lock = threading.Lock()
+        self._total = 0.0
+        self._active_jobs = 0
+        self._last_time: Optional[float] = None
+        self._last_cpu = 0.0
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        """Close the current sampling segment. Must hold ``self._lock``."""
+        now = time.monotonic()
+        cpu = psutil.cpu_percent(interval=None)
+        if self._active_jobs and self._last_time is not None:
+            self._total += calculate_energy_consumption(now - self._last_time, self._last_cpu, cpu)
+        self._last_time = now
+        self._last_cpu = cpu
+
+    def _run(self) -> None:
+        while True:
+            self._running.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                if self._active_jobs:
+                    self._sample()
+                else:
+                    self._running.clear()
+
+    def begin_job(self) -> MiningJob:
+        """Start accounting for a mining job."""
+        with self._lock:
+            self._sample()
+            self._active_jobs += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='energy-meter', daemon=True)
+                self._thread.start()
+            self._running.set()
+            job = MiningJob(self._total, self.hash_counters.totals())
+        return job
+
+    def end_job(self, job: MiningJob) -> MiningJob:
+        """Finish accounting for a mining job and fill in its totals."""
+        with self._lock:
+            self._sample()
+            self._active_jobs = max(0, self._active_jobs - 1)
+            total = self._total
+
+        hashes_end = self.hash_counters.totals()
+        deltas = [count - job.hashes_start.get(worker, 0) for worker, count in hashes_end.items()]
+
+        job.duration = time.monotonic() - job.start_time
+        job.energy_consumed = total - job.energy_start
+        job.hashes = sum(deltas)
+        job.workers = sum(1 for delta in deltas if delta > 0)
+        return job
+
+    def get_total(self) -> float:
+        with self._lock:
+            return self._total
+
+    def reset(self) -> None:
+        with self._lock:
+            self._total = 0.0
+        self.hash_counters.reset()
+
+
+# Process-wide energy meter used by the miner
+energy_meter = EnergyMeter()
+
+
+def _scrypt_hex(data: str, params: Dict[str, Any]) -> str:
+    """Scrypt a single string. The data doubles as the salt, as in Litecoin."""
+    data_bytes = data.encode('utf-8')
+    return hashlib.scrypt(
+        password=data_bytes,
+        salt=data_bytes,
+        n=params["n"],
+        r=params["r"],
+        p=params["p"],
+        dklen=params["dklen"]
+    ).hex()
+
+def _hash_chunk(headers: List[str], params: Dict[str, Any]) -> Tuple[int, List[str]]:
+    """Hash a chunk of headers in a pool worker and report the worker's pid."""
+    return os.getpid(), [_scrypt_hex(header, params) for header in headers]
+
+
+class ScryptBackend:
+    """
+    Base class for scrypt hashing backends.
+
+    Backends hash whole batches of headers per call, so a miner can hand
+    over a range of nonces at once. ``batch_size`` is the batch size the
+    backend works best with. ``params`` are the scrypt parameters used
+    when a call does not pass its own.
+    """
+
+    name = "base"
+    batch_size = 1
+
+    def __init__(self, params: Optional[Dict[str, Any]] = None):
+        self.params = dict(params or SCRYPT_PROFILES["standard"])
+
+    def hash_batch(self, headers: List[str], params: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Hash every header and return the hex digests in the same order."""
+        raise NotImplementedError
+
+    def hash(self, data: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Hash a single string."""
+        return self.hash_batch([data], params)[0]
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class SingleThreadBackend(ScryptBackend):
+    """Hash in the calling thread."""
+
+    name = "single"
+    batch_size = 8
+
+    def hash_batch(self, headers: List[str], params: Optional[Dict[str, Any]] = None) -> List[str]:
+        params = params or self.params
+        digests = [_scrypt_hex(header, params) for header in headers]
+        energy_meter.hash_counters.add(len(digests))
+        return digests
+
+
+class ProcessPoolBackend(ScryptBackend):
+    """Spread each batch across a persistent pool of worker processes."""
+
+    name = "pool"
+
+    def __init__(self, params: Optional[Dict[str, Any]] = None, workers: Optional[int] = None):
+        super().__init__(params)
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = self.workers * 4
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def hash_batch(self, headers: List[str], params: Optional[Dict[str, Any]] = None) -> List[str]:
+        params = params or self.params
+        executor = self._get_executor()
+        chunk_size = max(1, -(-len(headers) // self.workers))
+        futures = [
+            executor.submit(_hash_chunk, headers[i:i + chunk_size], params)
+            for i in range(0, len(headers), chunk_size)
+        ]
+
+        digests = []
+        for future in futures:
+            pid, chunk_digests = future.result()
+            energy_meter.hash_counters.add(len(chunk_digests), worker=f"pid-{pid}")
+            digests.extend(chunk_digests)
+        return digests
+
+    def hash(self, data: str, params: Optional[Dict[str, Any]] = None) -> str:
+        # A single hash is not worth a round trip to the pool
+        digest = _scrypt_hex(data, params or self.params)
+        energy_meter.hash_counters.add()
+        return digest
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+class LowCostBackend(SingleThreadBackend):
+    """Single-thread backend defaulting to the low-cost test parameters."""
+
+    name = "test"
+
+    def __init__(self, params: Optional[Dict[str, Any]] = None):
+        super().__init__(params or SCRYPT_PROFILES["test"])
+
+
+BACKENDS = {
+    SingleThreadBackend.name: SingleThreadBackend,
+    ProcessPoolBackend.name: ProcessPoolBackend,
+    LowCostBackend.name: LowCostBackend,
+}
+
+_backend: Optional[ScryptBackend] = None
+_backend_lock = threading.Lock()
+
+def create_backend(name: str, params: Optional[Dict[str, Any]] = None, **options) -> ScryptBackend:
+    """
+    Create a hashing backend by name.
     
     Args:
-        data: The data to hash
+        name: One of the names in ``BACKENDS``
+        params: Scrypt parameters; defaults to the backend's own profile
+        options: Backend specific options, e.g. ``workers`` for the pool
         
     Returns:
-        The hexadecimal digest of the hash
+        The new backend
     """
-    global _total_energy_consumed
-    
-    # Convert data to bytes
-    data_bytes = data.encode('utf-8')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown scrypt backend: {name}")
+    return BACKENDS[name](params, **options)
+
+def get_backend() -> ScryptBackend:
+    """
+    Get the active hashing backend.
     
-    # Generate a random salt (in a real implementation, this would be stored)
-    salt = bytes([random.randint(0, 255) for _ in range(16)])
+    The first call creates it from the ``EZC_SCRYPT_BACKEND`` environment
+    variable (default ``single``). ``EZC_SCRYPT_WORKERS`` sizes the pool.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = os.environ.get("EZC_SCRYPT_BACKEND", SingleThreadBackend.name)
+            options = {}
+            if name == ProcessPoolBackend.name and os.environ.get("EZC_SCRYPT_WORKERS"):
+                options["workers"] = int(os.environ["EZC_SCRYPT_WORKERS"])
+            _backend = create_backend(name, **options)
+        return _backend
+
+def set_backend(name: str, params: Optional[Dict[str, Any]] = None, **options) -> ScryptBackend:
+    """Replace the active hashing backend, closing the previous one."""
+    global _backend
+    backend = create_backend(name, params, **options)
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    if previous is not None:
+        previous.close()
+    return backend
+
+def self_check(params: Optional[Dict[str, Any]] = None, samples: int = 4) -> None:
+    """
+    Check that every backend produces identical digests.
     
-    # Measure CPU usage before hashing
-    cpu_percent_before = psutil.cpu_percent(interval=None)
-    start_time = time.time()
+    Each backend is run with the same parameters (by default those of the
+    active backend) over a few sample headers.
     
-    # Perform Scrypt hashing
-    hash_result = hashlib.scrypt(
-        password=data_bytes,
-        salt=salt,
-        n=SCRYPT_N,
-        r=SCRYPT_R,
-        p=SCRYPT_P,
-        dklen=SCRYPT_DKLEN
-    )
+    Raises:
+        RuntimeError: If any backend disagrees with the single-thread backend
+    """
+    params = params or get_backend().params
+    headers = [f"elizaicoin-self-check-{i}" for i in range(samples)]
+    expected = [_scrypt_hex(header, params) for header in headers]
+
+    for name, backend_class in BACKENDS.items():
+        backend = backend_class(params)
+        try:
+            digests = backend.hash_batch(headers)
+        finally:
+            backend.close()
+        if digests != expected:
+            raise RuntimeError(f"Scrypt backend '{name}' failed the self-check")
+
+def hash_batch(headers: List[str], params: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Hash a batch of strings with the active backend.
     
-    # Measure time and CPU usage after hashing
-    elapsed_time = time.time() - start_time
-    cpu_percent_after = psutil.cpu_percent(interval=None)
+    Args:
+        headers: The strings to hash, e.g. one block header per nonce
+        params: Scrypt parameters; defaults to the backend's parameters
+        
+    Returns:
+        The hexadecimal digests in the same order
+    """
+    return get_backend().hash_batch(headers, params)
+
+def hash_scrypt(data: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Hash data using Scrypt algorithm with the specified parameters.
     
-    # Simulate energy consumption based on CPU usage and time
-    # In a real system, this would be measured using hardware sensors
-    energy_consumed = calculate_energy_consumption(elapsed_time, cpu_percent_before, cpu_percent_after)
-    _total_energy_consumed += energy_consumed
+    The data doubles as the salt, as in Litecoin, so the digest is
+    deterministic and can be re-verified by other nodes.
     
-    # Return the hexadecimal digest
-    return hash_result.hex()
+    Args:
+        data: The data to hash
+        params: Scrypt parameters; defaults to the backend's parameters
+        
+    Returns:
+        The hexadecimal digest of the hash
+    """
+    return get_backend().hash(data, params)
 
 def calculate_energy_consumption(elapsed_time: float, cpu_before: float, cpu_after: float) -> float:
     """
@@ -92,13 +419,11 @@ def get_energy_consumption() -> float:
     Returns:
         Total energy consumption in arbitrary units
     """
-    global _total_energy_consumed
-    return _total_energy_consumed
+    return energy_meter.get_total()
 
 def reset_energy_consumption() -> None:
-    """Reset the energy consumption counter."""
-    global _total_energy_consumed
-    _total_energy_consumed = 0.0
+    """Reset the energy consumption and hash counters."""
+    energy_meter.reset()
 
 def get_scrypt_params() -> Dict[str, Any]:
     """
@@ -107,9 +432,4 @@ def get_scrypt_params() -> Dict[str, Any]:
     Returns:
         Dictionary containing the Scrypt parameters
     """
-    return {
-        "n": SCRYPT_N,
-        "r": SCRYPT_R,
-        "p": SCRYPT_P,
-        "dklen": SCRYPT_DKLEN
-    }
+    return dict(get_backend().params)
@@ -13,9 +13,12 @@ import uuid
 import argparse
 import signal
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Any, Optional, Set
 import scrypt_utils
 from blockchain import Blockchain, Block
+from networks import NETWORKS
 
 # Configure logging
 logging.basicConfig(
@@ -33,6 +36,158 @@ current_job = None
 current_difficulty = 4
 mining_address = None
 server = None
+share_executor = None  # Process pool for share hashing, created in start_server
+send_queue_size = 100  # Outbound messages buffered per client before it is dropped
+
+# Share difficulty 1 means two leading zero hex digits (256 hashes on average)
+DIFF1_TARGET = 16 ** 62
+EXTRANONCE2_SIZE = 4
+
+# Variable difficulty settings; None disables vardiff (see --no-vardiff)
+vardiff_config = {
+    "target_spm": 20,          # Target accepted shares per minute per client
+    "window": 300,             # Seconds of share history used for the rate
+    "retarget_interval": 30,   # Minimum seconds between retargets
+    "min_difficulty": 0.001,
+    "max_difficulty": 1_000_000,
+}
+
+def difficulty_to_target(difficulty: float) -> int:
+    """Convert a share difficulty to the highest acceptable hash value."""
+    return int(DIFF1_TARGET / difficulty)
+
+def network_target(difficulty: int) -> int:
+    """Target for a block needing `difficulty` leading zero hex digits."""
+    return 16 ** (64 - difficulty)
+
+def sha256d(data: bytes) -> bytes:
+    """Double SHA-256, as used for Stratum coinbase and Merkle hashes."""
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+def build_header(job, extranonce1, extranonce2, ntime, nonce):
+    """
+    Rebuild the block header a miner hashed for a share.
+    
+    The coinbase is coinbase1 + extranonce1 + extranonce2 + coinbase2; its
+    hash is folded with the Merkle branch to give the Merkle root.
+    """
+    coinbase = bytes.fromhex(job["coinbase1"] + extranonce1 + extranonce2 + job["coinbase2"])
+    merkle_root = sha256d(coinbase)
+    for branch_hash in job["merkle_branch"]:
+        merkle_root = sha256d(merkle_root + bytes.fromhex(branch_hash))
+    
+    return job["version"] + job["prevhash"] + merkle_root.hex() + ntime + job["nbits"] + nonce
+
+def _is_hex(value, length):
+    if not isinstance(value, str) or len(value) != length:
+        return False
+    try:
+        int(value, 16)
+    except ValueError:
+        return False
+    return True
+
+class LatencyTracker:
+    """Bounded sample of latencies (in seconds) with percentile summaries."""
+    
+    def __init__(self, maxlen=10000):
+        self.samples = deque(maxlen=maxlen)
+        self.count = 0
+    
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+    
+    def percentiles(self):
+        """Summarize the retained samples in milliseconds."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"count": 0, "p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        
+        def pick(fraction):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+        
+        return {
+            "count": self.count,
+            "p50_ms": pick(0.5),
+            "p90_ms": pick(0.9),
+            "p99_ms": pick(0.99),
+            "max_ms": ordered[-1] * 1000
+        }
+    
+    def reset(self):
+        self.samples.clear()
+        self.count = 0
+
+
+# Time from queueing a broadcast (notify or set_difficulty) to writing it, per client
+notify_latency = LatencyTracker()
+
+
+class VarDiff:
+    """
+    Variable share difficulty for one client.
+    
+    Keeps a sliding window of accepted shares with the difficulty each was
+    worth, estimates the client's work rate from it and retargets the share
+    difficulty so the client submits about ``target_spm`` shares a minute.
+    """
+    
+    # Ignore retargets smaller than this fraction, and never move by more than MAX_STEP
+    TOLERANCE = 0.3
+    MAX_STEP = 4.0
+    
+    def __init__(self, target_spm, window, retarget_interval, min_difficulty, max_difficulty):
+        self.target_spm = target_spm
+        self.window = window
+        self.retarget_interval = retarget_interval
+        self.min_difficulty = min_difficulty
+        self.max_difficulty = max_difficulty
+        self.shares = deque()  # (timestamp, difficulty) of accepted shares
+        self.started = time.time()
+        self.last_retarget = self.started
+    
+    def record_share(self, difficulty, now=None):
+        """Record an accepted share worth `difficulty`."""
+        now = now or time.time()
+        self.shares.append((now, difficulty))
+        self._expire(now)
+    
+    def _expire(self, now):
+        while self.shares and self.shares[0][0] < now - self.window:
+            self.shares.popleft()
+    
+    def retarget(self, difficulty, now=None):
+        """
+        Work out a new share difficulty.
+        
+        Returns:
+            The new difficulty, or None if it should stay as it is
+        """
+        now = now or time.time()
+        if now - self.last_retarget < self.retarget_interval:
+            return None
+        self._expire(now)
+        
+        elapsed = min(self.window, now - self.started)
+        if elapsed <= 0:
+            return None
+        
+        # Work per minute in difficulty-1 shares, then the difficulty giving target_spm shares
+        work_per_minute = sum(share_difficulty for _, share_difficulty in self.shares) * 60 / elapsed
+        if work_per_minute > 0:
+            new_difficulty = work_per_minute / self.target_spm
+        else:
+            new_difficulty = difficulty / self.MAX_STEP
+        
+        new_difficulty = max(difficulty / self.MAX_STEP, min(difficulty * self.MAX_STEP, new_difficulty))
+        new_difficulty = max(self.min_difficulty, min(self.max_difficulty, new_difficulty))
+        
+        self.last_retarget = now
+        if abs(new_difficulty - difficulty) <= difficulty * self.TOLERANCE:
+            return None
+        return new_difficulty
+
 
 class StratumClient:
     def __init__(self, reader, writer, client_id):
@@ -44,26 +199,90 @@ class StratumClient:
         self.authorized = False
         self.worker_name = None
         self.difficulty = current_difficulty
+        self.previous_difficulty = None  # Still honoured until the next job
+        self.vardiff = VarDiff(**vardiff_config) if vardiff_config else None
+        self.extranonce1 = None
         self.shares_submitted = 0
         self.valid_shares = 0
+        self.rejected_shares = 0
         self.last_activity = time.time()
+        self.send_queue = asyncio.Queue(maxsize=send_queue_size)
+        self.writer_task = None
+        self.closed = False
+        
+    def send_response(self, response_data, broadcast=False):
+        """Queue a JSON message for the client"""
+        response_str = json.dumps(response_data) + '\n'
+        self.queue_message(response_str.encode(), broadcast)
+    
+    def queue_message(self, data, broadcast=False):
+        """
+        Queue encoded bytes for the client's writer task without waiting.
         
-    async def send_response(self, response_data):
-        """Send JSON response to client"""
+        A client whose queue is full is too slow to keep up and is dropped,
+        so it cannot hold back anyone else. Broadcast messages record their
+        fan-out latency once written.
+        
+        Returns:
+            True if the message was queued
+        """
+        if self.closed:
+            return False
+        if self.writer_task is None:
+            self.writer_task = asyncio.get_running_loop().create_task(self._write_loop())
+        try:
+            self.send_queue.put_nowait((data, time.perf_counter() if broadcast else None))
+        except asyncio.QueueFull:
+            logger.warning(f"Send queue overflow for {self.address}, dropping client")
+            self.close()
+            return False
+        return True
+    
+    async def _write_loop(self):
+        """Write queued messages to the socket, one client per task"""
         try:
-            response_str = json.dumps(response_data) + '\n'
-            self.writer.write(response_str.encode())
-            await self.writer.drain()
-            self.last_activity = time.time()
+            while True:
+                data, queued_at = await self.send_queue.get()
+                try:
+                    self.writer.write(data)
+                    await self.writer.drain()
+                    self.last_activity = time.time()
+                    if queued_at is not None:
+                        notify_latency.record(time.perf_counter() - queued_at)
+                finally:
+                    self.send_queue.task_done()
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
             logger.error(f"Error sending response to {self.address}: {e}")
+            self.close()
+    
+    async def flush(self):
+        """Wait until every queued message has been written"""
+        if self.writer_task is not None and not self.writer_task.done():
+            await self.send_queue.join()
+    
+    def close(self):
+        """Stop the writer task, close the socket and forget the client"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.writer_task is not None and self.writer_task is not asyncio.current_task():
+            self.writer_task.cancel()
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+        connected_clients.pop(self.client_id, None)
+        job_subscribers.discard(self.client_id)
             
     async def handle_subscribe(self, message):
         """Handle subscription request"""
         # Standard subscription response with session ID and extranonce
         session_id = str(uuid.uuid4())
         extranonce1 = hashlib.sha256(session_id.encode()).hexdigest()[:8]
-        extranonce2_size = 4
+        extranonce2_size = EXTRANONCE2_SIZE
+        self.extranonce1 = extranonce1
         
         response = {
             "id": message.get("id", 0),
@@ -81,20 +300,20 @@ class StratumClient:
         self.subscribed = True
         job_subscribers.add(self.client_id)
         
-        await self.send_response(response)
+        self.send_response(response)
         
         # Send initial difficulty
-        await self.send_difficulty(current_difficulty)
+        self.send_difficulty(current_difficulty)
         
         # Send current job if available
         if current_job:
-            await self.send_job(current_job, clean_jobs=True)
+            self.send_job(current_job, clean_jobs=True)
             
     async def handle_authorize(self, message):
         """Handle authorization request"""
         params = message.get("params", [])
         if len(params) < 2:
-            await self.send_error_response(message.get("id", 0), -1, "Invalid params")
+            self.send_error_response(message.get("id", 0), -1, "Invalid params")
             return
             
         worker_name = params[0]
@@ -111,18 +330,18 @@ class StratumClient:
             "error": None
         }
         
-        await self.send_response(response)
+        self.send_response(response)
         logger.info(f"Worker {worker_name} authorized from {self.address}")
         
     async def handle_submit(self, message):
         """Handle share submission"""
         if not self.authorized:
-            await self.send_error_response(message.get("id", 0), -1, "Not authorized")
+            self.send_error_response(message.get("id", 0), -1, "Not authorized")
             return
             
         params = message.get("params", [])
         if len(params) < 5:
-            await self.send_error_response(message.get("id", 0), -1, "Invalid params")
+            self.send_error_response(message.get("id", 0), -1, "Invalid params")
             return
             
         worker_name = params[0]
@@ -133,44 +352,80 @@ class StratumClient:
         
         self.shares_submitted += 1
         
-        # Validate the share
-        # In a real implementation, verify the proof of work
-        # For this demo, we'll accept shares with a certain probability based on difficulty
+        # Cheap checks first: the share must be for the current job and well formed
+        job = current_job
+        if job is None or job_id != job["job_id"]:
+            self.reject_share(message, 21, "Job not found")
+            return
+        if not (_is_hex(extranonce2, EXTRANONCE2_SIZE * 2) and _is_hex(ntime, 8) and _is_hex(nonce, 8)):
+            self.reject_share(message, 20, "Malformed share")
+            return
         
-        # Simulate share validation
-        share_valid = True
+        # Hash in the process pool so the event loop keeps serving miners
+        header = build_header(job, self.extranonce1, extranonce2, ntime, nonce)
+        loop = asyncio.get_running_loop()
+        hash_value = await loop.run_in_executor(share_executor, scrypt_utils.hash_scrypt,
+                                                header, blockchain.scrypt_params)
+        hash_int = int(hash_value, 16)
         
-        if share_valid:
-            self.valid_shares += 1
+        # Shares mined before a retarget are still valid at the old difficulty
+        share_difficulty = self.difficulty
+        if self.previous_difficulty is not None:
+            share_difficulty = min(share_difficulty, self.previous_difficulty)
+        if hash_int >= difficulty_to_target(share_difficulty):
+            self.reject_share(message, 23, "Low difficulty share")
+            return
+        
+        self.valid_shares += 1
+        if self.vardiff:
+            self.vardiff.record_share(share_difficulty)
+        
+        # Check if this share solves the block
+        block_solved = hash_int < job["target"]
+        
+        # If block is solved, add it to the blockchain
+        if block_solved:
+            # Create a new block with pending transactions, off the event loop
+            new_block = await loop.run_in_executor(None, blockchain.mine_pending_transactions, mining_address)
+            logger.info(f"New block mined by {worker_name}: {new_block.hash}")
             
-            # Check if this share solves the block
-            block_solved = False
+            # Generate a new job
+            await generate_new_job()
             
-            # If block is solved, add it to the blockchain
-            if block_solved:
-                # Create a new block with pending transactions
-                new_block = blockchain.mine_pending_transactions(mining_address)
-                logger.info(f"New block mined by {worker_name}: {new_block.hash}")
-                
-                # Generate a new job
-                await generate_new_job()
-                
-            response = {
-                "id": message.get("id", 0),
-                "result": True,
-                "error": None
-            }
-        else:
-            response = {
-                "id": message.get("id", 0),
-                "result": False,
-                "error": [20, "Invalid share", None]
-            }
-            
-        await self.send_response(response)
+        response = {
+            "id": message.get("id", 0),
+            "result": True,
+            "error": None
+        }
+        
+        self.send_response(response)
         
-    async def send_difficulty(self, difficulty):
+        self.check_vardiff()
+    
+    def check_vardiff(self):
+        """Retarget the share difficulty if the client's share rate has drifted"""
+        if not self.vardiff or not self.subscribed:
+            return
+        new_difficulty = self.vardiff.retarget(self.difficulty)
+        if new_difficulty is not None:
+            logger.info(f"Vardiff for {self.worker_name or self.address}: {self.difficulty:g} -> {new_difficulty:g}")
+            self.send_difficulty(new_difficulty)
+    
+    def reject_share(self, message, code, reason):
+        """Count a rejected share and tell the miner why"""
+        self.rejected_shares += 1
+        response = {
+            "id": message.get("id", 0),
+            "result": False,
+            "error": [code, reason, None]
+        }
+        
+        self.send_response(response)
+        
+    def send_difficulty(self, difficulty):
         """Send difficulty to client"""
+        if difficulty != self.difficulty:
+            self.previous_difficulty = self.difficulty
         self.difficulty = difficulty
         
         notification = {
@@ -179,12 +434,15 @@ class StratumClient:
             "params": [difficulty]
         }
         
-        await self.send_response(notification)
+        self.send_response(notification, broadcast=True)
         
-    async def send_job(self, job, clean_jobs=False):
+    def send_job(self, job, clean_jobs=False):
         """Send job to client"""
         if not self.subscribed:
             return
+        
+        # Work for the new job is mined at the current difficulty only
+        self.previous_difficulty = None
             
         notification = {
             "id": None,
@@ -202,9 +460,9 @@ class StratumClient:
             ]
         }
         
-        await self.send_response(notification)
+        self.send_response(notification, broadcast=True)
         
-    async def send_error_response(self, message_id, code, message):
+    def send_error_response(self, message_id, code, message):
         """Send error response to client"""
         response = {
             "id": message_id,
@@ -212,7 +470,7 @@ class StratumClient:
             "error": [code, message, None]
         }
         
-        await self.send_response(response)
+        self.send_response(response)
 
 async def handle_client(reader, writer):
     """Handle a client connection"""
@@ -241,7 +499,7 @@ async def handle_client(reader, writer):
                     await client.handle_submit(message)
                 else:
                     # Unknown method
-                    await client.send_error_response(message.get("id", 0), -1, f"Unknown method: {method}")
+                    client.send_error_response(message.get("id", 0), -1, f"Unknown method: {method}")
                     
             except json.JSONDecodeError:
                 logger.warning(f"Invalid JSON from {addr}: {data.decode()}")
@@ -252,13 +510,11 @@ async def handle_client(reader, writer):
         logger.error(f"Error handling client {addr}: {e}")
     finally:
         # Clean up
-        if client_id in connected_clients:
-            del connected_clients[client_id]
-        if client_id in job_subscribers:
-            job_subscribers.remove(client_id)
-            
-        writer.close()
-        await writer.wait_closed()
+        client.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
         logger.info(f"Connection closed for {addr}")
 
 async def generate_new_job():
@@ -289,14 +545,15 @@ async def generate_new_job():
         "merkle_branch": merkle_branch,
         "version": version,
         "nbits": nbits,
-        "ntime": ntime
+        "ntime": ntime,
+        "target": network_target(blockchain.difficulty)
     }
     
-    # Send job to all subscribed clients
-    for client_id in job_subscribers:
-        if client_id in connected_clients:
-            client = connected_clients[client_id]
-            await client.send_job(current_job)
+    # Queue the job for all subscribed clients; writer tasks send it concurrently
+    for client_id in list(job_subscribers):
+        client = connected_clients.get(client_id)
+        if client:
+            client.send_job(current_job)
             
     logger.info(f"New job generated: {job_id}")
 
@@ -314,10 +571,21 @@ async def update_difficulty():
             current_difficulty = new_difficulty
             logger.info(f"Updating difficulty to {current_difficulty}")
             
-            # Send new difficulty to all clients
-            for client_id, client in connected_clients.items():
-                if client.subscribed:
-                    await client.send_difficulty(current_difficulty)
+            # Send new difficulty to all clients not on vardiff
+            for client_id, client in list(connected_clients.items()):
+                if client.subscribed and not client.vardiff:
+                    client.send_difficulty(current_difficulty)
+
+async def retarget_clients():
+    """Periodically retarget vardiff clients, including those that stopped submitting"""
+    if not vardiff_config:
+        return
+    
+    while True:
+        await asyncio.sleep(vardiff_config["retarget_interval"])
+        
+        for client in list(connected_clients.values()):
+            client.check_vardiff()
 
 async def monitor_clients():
     """Monitor client connections and clean up inactive ones"""
@@ -336,20 +604,20 @@ async def monitor_clients():
             if client_id in connected_clients:
                 client = connected_clients[client_id]
                 logger.info(f"Removing inactive client: {client.address}")
-                
-                try:
-                    client.writer.close()
-                except:
-                    pass
-                    
-                if client_id in connected_clients:
-                    del connected_clients[client_id]
-                if client_id in job_subscribers:
-                    job_subscribers.remove(client_id)
+                client.close()
+        
+        if notify_latency.count:
+            summary = notify_latency.percentiles()
+            logger.info(f"Notify fan-out latency over {summary['count']} sends: "
+                        f"p50={summary['p50_ms']:.2f}ms p90={summary['p90_ms']:.2f}ms "
+                        f"p99={summary['p99_ms']:.2f}ms max={summary['max_ms']:.2f}ms")
 
-async def start_server(host, port):
+async def start_server(host, port, share_workers=None):
     """Start the stratum server"""
-    global server
+    global server, share_executor
+    
+    # Persistent pool for share hashing
+    share_executor = ProcessPoolExecutor(max_workers=share_workers)
     
     # Generate initial job
     await generate_new_job()
@@ -362,6 +630,7 @@ async def start_server(host, port):
     
     # Start background tasks
     asyncio.create_task(update_difficulty())
+    asyncio.create_task(retarget_clients())
     asyncio.create_task(monitor_clients())
     
     async with server:
@@ -379,16 +648,46 @@ if __name__ == "__main__":
     parser.add_argument('--host', type=str, default='0.0.0.0', help='Host to bind to')
     parser.add_argument('--port', type=int, default=3333, help='Port to bind to')
     parser.add_argument('--address', type=str, required=True, help='Mining reward address')
+    parser.add_argument('--network', type=str, default='mainnet', choices=sorted(NETWORKS),
+                        help='Network profile')
+    parser.add_argument('--share-workers', type=int, default=None,
+                        help='Processes used to hash submitted shares (default: CPU count)')
+    parser.add_argument('--send-queue-size', type=int, default=send_queue_size,
+                        help='Outbound messages buffered per client before it is dropped')
+    parser.add_argument('--no-vardiff', action='store_true', help='Give every client the global difficulty')
+    parser.add_argument('--vardiff-target', type=float, default=vardiff_config["target_spm"],
+                        help='Target shares per minute per client')
+    parser.add_argument('--vardiff-window', type=float, default=vardiff_config["window"],
+                        help='Seconds of share history used by vardiff')
+    parser.add_argument('--vardiff-retarget', type=float, default=vardiff_config["retarget_interval"],
+                        help='Minimum seconds between vardiff retargets')
+    parser.add_argument('--min-difficulty', type=float, default=vardiff_config["min_difficulty"],
+                        help='Lowest share difficulty')
+    parser.add_argument('--max-difficulty', type=float, default=vardiff_config["max_difficulty"],
+                        help='Highest share difficulty')
     
     args = parser.parse_args()
     
     mining_address = args.address
+    blockchain = Blockchain(network=args.network)
+    current_difficulty = blockchain.difficulty
+    send_queue_size = args.send_queue_size
+    vardiff_config = None if args.no_vardiff else {
+        "target_spm": args.vardiff_target,
+        "window": args.vardiff_window,
+        "retarget_interval": args.vardiff_retarget,
+        "min_difficulty": args.min_difficulty,
+        "max_difficulty": args.max_difficulty,
+    }
+    
+    # Make sure every scrypt backend agrees before accepting miners
+    scrypt_utils.self_check(blockchain.scrypt_params)
     
     # Set up signal handlers
     signal.signal(signal.SIGINT, handle_signal)
     signal.signal(signal.SIGTERM, handle_signal)
     
     try:
-        asyncio.run(start_server(args.host, args.port))
+        asyncio.run(start_server(args.host, args.port, args.share_workers))
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Synthetic chain generator for Elizaicoin scale testing.
+
+Builds large, internally consistent chains without proof of work: blocks
+link by hash, indexes and timestamps are monotonic, and coinbase rewards
+follow the halving schedule. Block hashes are plain SHA-256 digests, NOT
+scrypt proofs, so the result can only be loaded with
+``Blockchain.import_chain(blocks, trusted=True)``.
+
+    python synthetic_chain.py --blocks 1000000 --output chain.jsonl
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import time
+from typing import Dict, Iterator, List, Optional
+
+from blockchain import Blockchain, Block
+from networks import get_network
+
+ADDRESS_DISTRIBUTIONS = ("uniform", "zipf")
+
+
+def _address_picker(rng: random.Random, num_addresses: int, distribution: str, zipf_s: float):
+    """Return a function drawing ``k`` addresses from the distribution."""
+    addresses = [f"ezc{i:040x}" for i in range(num_addresses)]
+    if distribution == "uniform":
+        return lambda k: rng.choices(addresses, k=k)
+    if distribution == "zipf":
+        cum_weights = list(itertools.accumulate(1.0 / (rank ** zipf_s) for rank in range(1, num_addresses + 1)))
+        return lambda k: rng.choices(addresses, cum_weights=cum_weights, k=k)
+    raise ValueError(f"Unknown address distribution: {distribution}")
+
+
+def generate_chain(num_blocks: int, txs_per_block: int = 5, num_addresses: int = 1000,
+                   distribution: str = "uniform", zipf_s: float = 1.1,
+                   start_time: Optional[float] = None, block_interval: float = 60.0,
+                   jitter: float = 0.2, difficulty: int = 4, network: Optional[str] = None,
+                   block_reward: float = 10.0, seed: Optional[int] = None) -> Iterator[Block]:
+    """
+    Generate a synthetic chain, genesis first.
+
+    Args:
+        num_blocks: Number of blocks including genesis
+        txs_per_block: Transfers per block, before the coinbase
+        num_addresses: Size of the address pool
+        distribution: "uniform" or "zipf" address popularity
+        zipf_s: Exponent of the zipf distribution
+        start_time: Genesis timestamp; defaults to num_blocks intervals ago
+        block_interval: Mean seconds between blocks
+        jitter: Relative random spread of the block interval
+        difficulty: Difficulty recorded in every block
+        network: Network profile providing the halving interval
+        block_reward: Base coinbase reward before halvings
+        seed: Random seed for reproducible chains
+
+    Yields:
+        Blocks with trusted (non-PoW) hashes
+    """
+    rng = random.Random(seed)
+    pick_addresses = _address_picker(rng, num_addresses, distribution, zipf_s)
+    halving_interval = get_network(network).halving_interval
+    timestamp = start_time if start_time is not None else time.time() - num_blocks * block_interval
+    previous_hash = "0"
+    tx_counter = 0
+
+    for index in range(num_blocks):
+        transactions: List[Dict] = []
+        if index > 0:
+            parties = pick_addresses(2 * txs_per_block + 1)
+            for i in range(txs_per_block):
+                tx_counter += 1
+                tx_time = timestamp - rng.random() * block_interval
+                amount = round(rng.uniform(0.01, 100.0), 4)
+                transactions.append({
+                    "sender": parties[2 * i],
+                    "recipient": parties[2 * i + 1],
+                    "amount": amount,
+                    "timestamp": tx_time,
+                    "data": {},
+                    "hash": hashlib.sha256(f"synthetic-tx-{tx_counter}".encode()).hexdigest()
+                })
+
+            # Coinbase goes last, as in mine_pending_transactions
+            tx_counter += 1
+            transactions.append({
+                "sender": "0",
+                "recipient": parties[-1],
+                "amount": block_reward / (2 ** (index // halving_interval)),
+                "timestamp": timestamp,
+                "data": {"type": "mining_reward"},
+                "hash": hashlib.sha256(f"synthetic-tx-{tx_counter}".encode()).hexdigest()
+            })
+
+        block_hash = hashlib.sha256(f"synthetic-block-{index}-{previous_hash}".encode()).hexdigest()
+        yield Block.from_dict({
+            "index": index,
+            "timestamp": timestamp,
+            "transactions": transactions,
+            "previous_hash": previous_hash,
+            "hash": block_hash,
+            "nonce": 0,
+            "difficulty": difficulty,
+            "energy_consumed": round(rng.uniform(0.5, 1.5), 6)
+        })
+
+        previous_hash = block_hash
+        timestamp += block_interval * (1 + rng.uniform(-jitter, jitter))
+
+
+def load_synthetic_chain(blocks, network: Optional[str] = None) -> Blockchain:
+    """Inject generated blocks into a new Blockchain in trusted mode."""
+    blockchain = Blockchain(network=network)
+    blockchain.import_chain(blocks, trusted=True)
+    return blockchain
+
+
+def write_chain(blocks, path: str) -> int:
+    """Write blocks to a JSON-lines file. Returns the number of blocks written."""
+    count = 0
+    with open(path, 'w') as f:
+        for block in blocks:
+            f.write(json.dumps(block.to_dict()))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def read_chain(path: str) -> Iterator[Block]:
+    """Read blocks back from a JSON-lines file."""
+    with open(path) as f:
+        for line in f:
+            yield Block.from_dict(json.loads(line))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Elizaicoin synthetic chain generator')
+    parser.add_argument('--blocks', type=int, required=True, help='Number of blocks including genesis')
+    parser.add_argument('--txs-per-block', type=int, default=5, help='Transfers per block')
+    parser.add_argument('--addresses', type=int, default=1000, help='Size of the address pool')
+    parser.add_argument('--distribution', type=str, default='uniform', choices=ADDRESS_DISTRIBUTIONS,
+                        help='Address popularity distribution')
+    parser.add_argument('--block-interval', type=float, default=60.0, help='Mean seconds between blocks')
+    parser.add_argument('--network', type=str, default=None, help='Network profile')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+    parser.add_argument('--output', type=str, required=True, help='JSON-lines output file')
+
+    args = parser.parse_args()
+
+    start = time.time()
+    written = write_chain(generate_chain(
+        args.blocks,
+        txs_per_block=args.txs_per_block,
+        num_addresses=args.addresses,
+        distribution=args.distribution,
+        block_interval=args.block_interval,
+        network=args.network,
+        seed=args.seed
+    ), args.output)
+    print(f"Wrote {written} blocks to {args.output} in {time.time() - start:.1f}s")
@@ -3,12 +3,15 @@ import os
 import unittest
 import json
 import time
+import hashlib
 from unittest.mock import patch, MagicMock
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from blockchain import Blockchain, Block
+from networks import get_network
+from synthetic_chain import generate_chain, load_synthetic_chain
 import scrypt_utils
 
 class TestBlock(unittest.TestCase):
@@ -37,6 +40,12 @@ class TestBlock(unittest.TestCase):
         self.assertIsInstance(hash_value, str)
         self.assertTrue(len(hash_value) > 0)
     
+    def test_nonce_template(self):
+        """Test that the nonce template rebuilds the block string."""
+        prefix, suffix = self.block.get_nonce_template()
+        self.block.nonce = 1234
+        self.assertEqual(f"{prefix}1234{suffix}", self.block.get_block_string())
+    
     def test_to_dict(self):
         """Test that to_dict returns a dictionary with all block attributes."""
         block_dict = self.block.to_dict()
@@ -57,14 +66,18 @@ class TestBlockchain(unittest.TestCase):
         
         # Mock hash_scrypt to return predictable values for faster tests
         self.hash_patcher = patch('scrypt_utils.hash_scrypt', 
-                                 side_effect=lambda data: "0000" + hashlib.sha256(data.encode()).hexdigest()[4:])
+                                 side_effect=lambda data, params=None: "0000" + hashlib.sha256(data.encode()).hexdigest()[4:])
         self.mock_hash = self.hash_patcher.start()
+        self.batch_patcher = patch('scrypt_utils.hash_batch',
+                                  side_effect=lambda headers, params=None: [scrypt_utils.hash_scrypt(h) for h in headers])
+        self.mock_batch = self.batch_patcher.start()
         
         self.blockchain = Blockchain()
     
     def tearDown(self):
         self.energy_patcher.stop()
         self.hash_patcher.stop()
+        self.batch_patcher.stop()
     
     def test_blockchain_initialization(self):
         """Test that a blockchain is initialized with a genesis block."""
@@ -280,6 +293,81 @@ class TestBlockchain(unittest.TestCase):
         self.assertGreater(stats["supply_percentage"], 0)
 
 
+class TestNetworks(unittest.TestCase):
+    def test_regtest_mines_quickly(self):
+        """Test that regtest mines real scrypt blocks without mocks."""
+        blockchain = Blockchain(network="regtest")
+        self.assertEqual(blockchain.scrypt_params, scrypt_utils.SCRYPT_PROFILES["test"])
+        
+        start = time.time()
+        for _ in range(5):
+            blockchain.add_transaction("Alice", "Bob", 1.0)
+            blockchain.mine_pending_transactions("Miner")
+        
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(len(blockchain.chain), 6)
+        self.assertTrue(blockchain.is_chain_valid())
+        self.assertEqual(blockchain.get_chain_stats()["network"], "regtest")
+    
+    def test_regtest_does_not_retarget(self):
+        """Test that regtest keeps its fixed difficulty."""
+        blockchain = Blockchain(network="regtest")
+        for _ in range(blockchain.retarget_interval * 2):
+            blockchain.mine_pending_transactions("Miner")
+        self.assertEqual(blockchain.difficulty, blockchain.network.initial_difficulty)
+    
+    def test_mainnet_is_default(self):
+        """Test the mainnet profile parameters."""
+        network = get_network()
+        self.assertEqual(network.name, "mainnet")
+        self.assertEqual(network.scrypt_params["n"], 16384)
+        self.assertEqual(network.retarget_interval, 10)
+        self.assertEqual(network.halving_interval, 210000)
+    
+    def test_unknown_network(self):
+        """Test that an unknown network name is rejected."""
+        with self.assertRaises(ValueError):
+            Blockchain(network="nonexistent")
+
+
+class TestChainImport(unittest.TestCase):
+    def test_trusted_import_of_synthetic_chain(self):
+        """Test that a synthetic chain loads in trusted mode and stays consistent."""
+        blockchain = load_synthetic_chain(generate_chain(500, txs_per_block=3, distribution="zipf", seed=7))
+        
+        self.assertEqual(len(blockchain.chain), 500)
+        self.assertEqual(blockchain.trusted_height, 499)
+        self.assertTrue(blockchain.is_chain_valid())
+        self.assertEqual(blockchain.current_supply, 499 * 10.0)
+        timestamps = [block.timestamp for block in blockchain.chain]
+        self.assertEqual(timestamps, sorted(timestamps))
+        
+        # Tampering with a link is still detected
+        blockchain.chain[250].previous_hash = "broken"
+        self.assertFalse(blockchain.is_chain_valid())
+    
+    def test_untrusted_import_rejects_synthetic_chain(self):
+        """Test that synthetic (non-PoW) blocks are rejected outside trusted mode."""
+        blockchain = Blockchain(network="regtest")
+        with self.assertRaises(ValueError):
+            blockchain.import_chain(generate_chain(5, seed=1))
+    
+    def test_untrusted_import_of_mined_chain(self):
+        """Test that a mined chain round-trips through import_chain."""
+        source = Blockchain(network="regtest")
+        for _ in range(3):
+            source.add_transaction("Alice", "Bob", 1.0)
+            source.mine_pending_transactions("Miner")
+        
+        blockchain = Blockchain(network="regtest")
+        blockchain.import_chain(Block.from_dict(block.to_dict()) for block in source.chain)
+        
+        self.assertEqual(len(blockchain.chain), 4)
+        self.assertEqual(blockchain.trusted_height, -1)
+        self.assertEqual(blockchain.current_supply, source.current_supply)
+        self.assertTrue(blockchain.is_chain_valid())
+
+
 if __name__ == '__main__':
     import hashlib  # Import here to avoid conflict with mock
     unittest.main()
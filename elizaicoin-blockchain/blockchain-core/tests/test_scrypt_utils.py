@@ -0,0 +1,103 @@
+import sys
+import os
+import unittest
+import threading
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scrypt_utils
+
+
+class TestHashScrypt(unittest.TestCase):
+    def test_hash_is_deterministic(self):
+        """Test that hashing the same data twice gives the same digest."""
+        self.assertEqual(scrypt_utils.hash_scrypt("block"), scrypt_utils.hash_scrypt("block"))
+        self.assertNotEqual(scrypt_utils.hash_scrypt("block"), scrypt_utils.hash_scrypt("other"))
+
+
+class TestBackends(unittest.TestCase):
+    def test_backends_agree(self):
+        """Test that every backend gives the same digests for the same params."""
+        params = scrypt_utils.SCRYPT_PROFILES["test"]
+        headers = [f"header-{nonce}" for nonce in range(6)]
+        expected = scrypt_utils.SingleThreadBackend(params).hash_batch(headers)
+
+        for name in scrypt_utils.BACKENDS:
+            backend = scrypt_utils.create_backend(name, params)
+            try:
+                self.assertEqual(backend.hash_batch(headers), expected)
+                self.assertEqual(backend.hash(headers[0]), expected[0])
+            finally:
+                backend.close()
+
+    def test_self_check(self):
+        """Test that the startup self-check passes and detects a broken backend."""
+        scrypt_utils.self_check(scrypt_utils.SCRYPT_PROFILES["test"])
+
+        broken = lambda self, headers: ["00" * 32 for _ in headers]
+        with patch.object(scrypt_utils.LowCostBackend, 'hash_batch', broken):
+            with self.assertRaises(RuntimeError):
+                scrypt_utils.self_check(scrypt_utils.SCRYPT_PROFILES["test"])
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected."""
+        with self.assertRaises(ValueError):
+            scrypt_utils.create_backend("gpu")
+
+
+class TestEnergyMeter(unittest.TestCase):
+    def setUp(self):
+        self.meter = scrypt_utils.EnergyMeter(interval=0.01)
+
+    def test_hash_counters_aggregate_threads(self):
+        """Test that per-thread and named worker counts are summed."""
+        counters = self.meter.hash_counters
+
+        def work():
+            for _ in range(1000):
+                counters.add()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counters.add(250, worker="pid-1")
+
+        self.assertEqual(counters.total(), 4250)
+        self.assertEqual(len(counters.totals()), 5)
+        self.assertEqual(counters.totals()["pid-1"], 250)
+
+    def test_job_accounting(self):
+        """Test that a job records energy, hashes and active workers."""
+        with patch('scrypt_utils.psutil.cpu_percent', return_value=50.0):
+            job = self.meter.begin_job()
+            self.meter.hash_counters.add(10)
+            threading.Event().wait(0.05)
+            self.meter.end_job(job)
+
+        self.assertEqual(job.hashes, 10)
+        self.assertEqual(job.workers, 1)
+        self.assertGreater(job.duration, 0)
+        self.assertGreater(job.energy_consumed, 0)
+        self.assertAlmostEqual(self.meter.get_total(), job.energy_consumed)
+
+    def test_no_energy_outside_jobs(self):
+        """Test that idle time between jobs is not accounted."""
+        with patch('scrypt_utils.psutil.cpu_percent', return_value=50.0):
+            job = self.meter.begin_job()
+            self.meter.end_job(job)
+            energy = self.meter.get_total()
+            threading.Event().wait(0.05)
+            job = self.meter.begin_job()
+            self.meter.end_job(job)
+
+        # 50ms idle at 50% CPU would be worth about 0.0075 units
+        self.assertLess(job.energy_consumed, 0.001)
+        self.assertAlmostEqual(self.meter.get_total(), energy + job.energy_consumed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+import sys
+import os
+import unittest
+import asyncio
+import json
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scrypt_utils
+import stratum_server
+from blockchain import Blockchain
+
+
+class FakeWriter:
+    """Collects the messages a StratumClient writes."""
+
+    def __init__(self):
+        self.buffer = b""
+        self.closed = False
+
+    def get_extra_info(self, name):
+        return ("127.0.0.1", 12345)
+
+    def write(self, data):
+        self.buffer += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+    def messages(self):
+        return [json.loads(line) for line in self.buffer.decode().splitlines()]
+
+
+class StratumTestCase(unittest.TestCase):
+    def setUp(self):
+        stratum_server.blockchain = Blockchain(network="regtest")
+        stratum_server.mining_address = "pool-address"
+        stratum_server.share_executor = None
+        stratum_server.connected_clients.clear()
+        stratum_server.job_subscribers.clear()
+        stratum_server.current_job = None
+
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    async def connect(self, client_id="client-1"):
+        """Subscribe and authorize a client on a fresh job."""
+        await stratum_server.generate_new_job()
+        writer = FakeWriter()
+        client = stratum_server.StratumClient(None, writer, client_id)
+        stratum_server.connected_clients[client_id] = client
+        await client.handle_subscribe({"id": 1, "method": "mining.subscribe", "params": []})
+        await client.handle_authorize({"id": 2, "method": "mining.authorize", "params": ["worker.1", "x"]})
+        await client.flush()
+        return client, writer
+
+    def find_nonce(self, client, predicate, extranonce2="00000000"):
+        """Search nonces until the share hash satisfies the predicate."""
+        job = stratum_server.current_job
+        for nonce in range(100000):
+            nonce_hex = format(nonce, '08x')
+            header = stratum_server.build_header(job, client.extranonce1, extranonce2, job["ntime"], nonce_hex)
+            hash_int = int(scrypt_utils.hash_scrypt(header, stratum_server.blockchain.scrypt_params), 16)
+            if predicate(hash_int):
+                return nonce_hex
+        self.fail("No matching nonce found")
+
+    async def submit(self, client, nonce, job_id=None, extranonce2="00000000", ntime=None):
+        job = stratum_server.current_job
+        await client.handle_submit({
+            "id": 10,
+            "method": "mining.submit",
+            "params": ["worker.1", job_id or job["job_id"], extranonce2, ntime or job["ntime"], nonce]
+        })
+        await client.flush()
+
+
+class TestShareValidation(StratumTestCase):
+    def test_valid_share_accepted(self):
+        """Test that a share meeting the share target is accepted."""
+        async def scenario():
+            client, writer = await self.connect()
+            client.difficulty = 0.01
+            job_target = stratum_server.current_job["target"]
+            share_target = stratum_server.difficulty_to_target(client.difficulty)
+            nonce = self.find_nonce(client, lambda h: job_target <= h < share_target)
+            await self.submit(client, nonce)
+            return client, writer.messages()[-1]
+
+        client, response = self.run_async(scenario())
+        self.assertTrue(response["result"])
+        self.assertEqual(client.valid_shares, 1)
+        self.assertEqual(len(stratum_server.blockchain.chain), 1)
+
+    def test_low_difficulty_share_rejected(self):
+        """Test that a share above the share target is rejected."""
+        async def scenario():
+            client, writer = await self.connect()
+            client.difficulty = 1e12
+            await self.submit(client, "00000000")
+            return client, writer.messages()[-1]
+
+        client, response = self.run_async(scenario())
+        self.assertFalse(response["result"])
+        self.assertEqual(response["error"][0], 23)
+        self.assertEqual(client.rejected_shares, 1)
+
+    def test_unknown_job_and_malformed_share_rejected(self):
+        """Test that shares for unknown jobs or with bad fields are rejected."""
+        async def scenario():
+            client, writer = await self.connect()
+            await self.submit(client, "00000000", job_id="deadbeef")
+            await self.submit(client, "xyz")
+            return [message for message in writer.messages() if message.get("id") == 10]
+
+        stale, malformed = self.run_async(scenario())
+        self.assertEqual(stale["error"][0], 21)
+        self.assertEqual(malformed["error"][0], 20)
+
+    def test_block_solving_share(self):
+        """Test that a share meeting the network target extends the chain."""
+        async def scenario():
+            client, writer = await self.connect()
+            client.difficulty = 0.01
+            job_target = stratum_server.current_job["target"]
+            nonce = self.find_nonce(client, lambda h: h < job_target)
+            await self.submit(client, nonce)
+            return writer.messages()
+
+        messages = self.run_async(scenario())
+        self.assertTrue([m for m in messages if m.get("id") == 10][-1]["result"])
+        self.assertEqual(len(stratum_server.blockchain.chain), 2)
+
+
+class TestVarDiff(unittest.TestCase):
+    def make_vardiff(self):
+        return stratum_server.VarDiff(target_spm=20, window=300, retarget_interval=30,
+                                      min_difficulty=0.01, max_difficulty=1000)
+
+    def test_fast_miner_gets_higher_difficulty(self):
+        """Test that a client submitting too often is retargeted upwards."""
+        vardiff = self.make_vardiff()
+        start = vardiff.started
+        # 200 shares a minute at difficulty 1
+        for i in range(200):
+            vardiff.record_share(1, now=start + i * 0.3)
+        new_difficulty = vardiff.retarget(1, now=start + 60)
+        self.assertAlmostEqual(new_difficulty, 4.0)  # Clamped to MAX_STEP
+
+    def test_converges_to_target_rate(self):
+        """Test that the retargeted difficulty matches the observed work rate."""
+        vardiff = self.make_vardiff()
+        start = vardiff.started
+        # 40 shares a minute at difficulty 1: twice the target rate
+        for i in range(40):
+            vardiff.record_share(1, now=start + i * 1.5)
+        self.assertAlmostEqual(vardiff.retarget(1, now=start + 60), 2.0)
+
+    def test_idle_miner_gets_lower_difficulty(self):
+        """Test that a client with no shares is retargeted downwards, within bounds."""
+        vardiff = self.make_vardiff()
+        self.assertAlmostEqual(vardiff.retarget(1, now=vardiff.started + 60), 0.25)
+        self.assertEqual(vardiff.retarget(0.011, now=vardiff.started + 120), None)
+
+    def test_retarget_interval_respected(self):
+        """Test that retargets are rate limited."""
+        vardiff = self.make_vardiff()
+        self.assertIsNone(vardiff.retarget(1, now=vardiff.started + 10))
+
+    def test_client_receives_new_difficulty(self):
+        """Test that a retarget sends mining.set_difficulty to the client."""
+        async def scenario():
+            await stratum_server.generate_new_job()
+            writer = FakeWriter()
+            client = stratum_server.StratumClient(None, writer, "client-vardiff")
+            client.vardiff = self.make_vardiff()
+            await client.handle_subscribe({"id": 1, "method": "mining.subscribe", "params": []})
+            client.vardiff.last_retarget -= 60
+            client.vardiff.started -= 60
+            client.check_vardiff()
+            await client.flush()
+            return client, writer.messages()
+
+        stratum_server.blockchain = Blockchain(network="regtest")
+        client, messages = asyncio.run(scenario())
+        difficulty_messages = [m for m in messages if m.get("method") == "mining.set_difficulty"]
+        self.assertEqual(len(difficulty_messages), 2)
+        self.assertEqual(difficulty_messages[-1]["params"][0], client.difficulty)
+        self.assertLess(client.difficulty, stratum_server.current_difficulty)
+
+
+class SlowWriter(FakeWriter):
+    """A writer whose drain never completes, like a peer that stopped reading."""
+
+    async def drain(self):
+        await asyncio.Event().wait()
+
+
+class TestSendQueues(StratumTestCase):
+    def test_broadcast_not_blocked_by_slow_client(self):
+        """Test that a stalled client is dropped and does not delay the others."""
+        async def scenario():
+            await stratum_server.generate_new_job()
+            fast_writer, slow_writer = FakeWriter(), SlowWriter()
+            fast = stratum_server.StratumClient(None, fast_writer, "fast")
+            slow = stratum_server.StratumClient(None, slow_writer, "slow")
+            for client in (fast, slow):
+                stratum_server.connected_clients[client.client_id] = client
+                await client.handle_subscribe({"id": 1, "method": "mining.subscribe", "params": []})
+            
+            # Enough jobs to overflow the stalled client's queue
+            for _ in range(stratum_server.send_queue_size + 5):
+                await stratum_server.generate_new_job()
+            await fast.flush()
+            return fast, slow, fast_writer
+        
+        stratum_server.notify_latency.reset()
+        fast, slow, fast_writer = asyncio.run(scenario())
+        notifies = [m for m in fast_writer.messages() if m.get("method") == "mining.notify"]
+        self.assertEqual(len(notifies), stratum_server.send_queue_size + 6)
+        self.assertTrue(slow.closed)
+        self.assertFalse(fast.closed)
+        self.assertNotIn("slow", stratum_server.connected_clients)
+        self.assertIn("fast", stratum_server.connected_clients)
+        self.assertGreater(stratum_server.notify_latency.percentiles()["count"], 0)
+    
+    def test_latency_percentiles(self):
+        """Test the latency tracker's percentile summary."""
+        tracker = stratum_server.LatencyTracker()
+        for ms in range(1, 101):
+            tracker.record(ms / 1000)
+        summary = tracker.percentiles()
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["p50_ms"], 51)
+        self.assertAlmostEqual(summary["p99_ms"], 100)
+        self.assertAlmostEqual(summary["max_ms"], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()